@@ -0,0 +1 @@
+# Keeps the repository root on sys.path so that a bare `pytest` finds the reflex_wrapper package without installing it
@@ -4,40 +4,47 @@ Defines a generic Component class that automates State init boilerplate and prov
 """
 
 import reflex
-from functools import wraps
-from types import FunctionType, CodeType
-from copy import copy
+from functools import lru_cache
+from operator import attrgetter
+from types import FunctionType, CodeType, MappingProxyType
 from textwrap import dedent 
-import uuid
+import itertools
+import weakref
+
+@lru_cache(maxsize=256)
+def _compile_function_code(code_str):
+    """ Compiles a code string and returns the code object of the function it defines (cached per source)."""
+    compiled_code = compile(code_str, "<string>", "exec")
+    return next(obj for obj in compiled_code.co_consts if isinstance(obj, CodeType))
 
 def get_function(code_str, func_name):
     """ Compiles a function from a code string. Returns the corresponding function object."""
-    code_str = dedent(code_str)
-    compiled_code = compile(code_str, "<string>", "exec")
-    func_code = next(obj for obj in compiled_code.co_consts if isinstance(obj, CodeType))
+    func_code = _compile_function_code(dedent(code_str))
     return FunctionType(func_code, globals(), func_name)
 
 
-def get_class_dict(cls,excluded=()):
+# Attributes never copied by get_class_dict
+_DEFAULT_EXCLUDED=frozenset({'__dict__', '__weakref__', '__module__', '__qualname__','__annotations__'})
+
+def get_class_dict(cls,excluded=frozenset()):
     """
-    Returns a dict representing a given class, excluding chosen attributes
+    Returns a (name, bases, class_dict) tuple representing a given class, excluding chosen attributes
     """
-    excluded_attributes = {'__dict__', '__weakref__', '__module__', '__qualname__','__annotations__',*excluded}
-    class_dict = {
-        '__name__': cls.__name__,
-        '__bases__': tuple(base for base in cls.__bases__ if base != object),
-        '__annotations__':{k:v for k,v in cls.__annotations__.items() if not k in excluded},
-        **{k:v for k,v in cls.__dict__.items() if k not in excluded_attributes}
-    }
-    return class_dict
-
-def build_class(class_dict):
+    excluded_attributes = _DEFAULT_EXCLUDED.union(excluded)
+    name = cls.__name__
+    bases = tuple(base for base in cls.__bases__ if base != object)
+    attributes = cls.__dict__
+    annotations = attributes.get('__annotations__', {})
+    class_dict = {'__annotations__':{k:v for k,v in annotations.items() if k not in excluded_attributes}}
+    for k,v in attributes.items():
+        if k not in excluded_attributes:
+            class_dict[k]=v
+    return name, bases, class_dict
+
+def build_class(name, bases, class_dict):
     """
-    Reconstructs a class from a class_dict
+    Reconstructs a class from its name, bases and class_dict
     """
-    class_dict=copy(class_dict)
-    name = class_dict.pop('__name__')
-    bases = class_dict.pop('__bases__')
     return type(name, bases, class_dict)
 
 def auto_render(obj):
@@ -45,7 +52,6 @@ def auto_render(obj):
     Makes sure obj is or returns a reflex.Component instance
     """
     if callable(obj):
-        @wraps(obj)
         def decorated(*args,**kwargs)->reflex.Component:
             component=obj(*args,**kwargs)
             if isinstance(component,Component):
@@ -54,6 +60,8 @@ def auto_render(obj):
                 return component
             else:
                 raise TypeError(f"{obj.__name__} must return a component object")
+        # only the name is needed: reflex infers the page route from it
+        decorated.__name__=getattr(obj,'__name__',decorated.__name__)
         return decorated
     else:
         if isinstance(obj,Component):
@@ -64,6 +72,9 @@ def auto_render(obj):
             raise TypeError(f"{obj} should be a component object")
 
 
+# Used to give a unique name to each state created by use_state
+_state_counter=itertools.count()
+
 def use_state(default,vartype=None):
     """
     Creates a state with a single var 'value' set to default and returns the corresponding state var and setter
@@ -73,106 +84,159 @@ def use_state(default,vartype=None):
         'value':default,
         '__annotations__':{'value':vartype}
     }
-    cls_name="State_"+str(uuid.uuid4())
+    cls_name=f"State_{next(_state_counter)}"
     state=type(cls_name,(reflex.State,),attributes)
     state_var=state.value
     state_setter=state.set_value
     return state_var,state_setter
 
 
+# Kinds of attributes, as stored in State._attr_kinds
+NOT_STATE=0
+STATE_VAR=1
+STATE_SETTER=2
+STATE_ATTR=3
+
+class StateAttribute:
+
+    """
+    Descriptor shadowing a user-defined state attribute in the runtime class of a State subclass.
+    Reading it from an instance raises an AttributeError so that the lookup falls back to __getattr__,
+    which delegates it to the reflex.State object.
+    """
+
+    __slots__=('name',)
+
+    def __init__(self,name):
+        self.name=name
+
+    def __get__(self,obj,objtype=None):
+        if obj is None:
+            return self
+        raise AttributeError(self.name)
+
 class State:
 
-    _private=(
+    __slots__=('_state','_fields')
+
+    _private=frozenset({
         '_private',
+        '__slots__',
         '_state_model',
         '_state_attrs',
+        '_abstract',
         '_setup_state_class',
+        '_runtime_class',
+        '_setup_runtime_class',
         '_get_instance_state_class',
         '_state',
+        '_fields',
         '_set_default',
+        '__init_subclass__',
+        '__new__',
         '__init__',
         '__getattribute__',
         '__setattr__',
-        '_is_state_attr',
-        '_is_user_state_attr',
-        '_is_state_variable',
-        '_is_state_setter',
+        '_attr_kinds',
         '__doc__',
         '__class__'
-    )
+    })
 
     _state_model=None
     _state_attrs=None
+    _attr_kinds=None
+    _runtime_class=None
     
     @classmethod
     def _setup_state_model(cls):
         """
         Extract user defined attributes and methods from the State subclass to construct the Pydantic state model (reflex.Base)
+        If a parent class already has a state model, the subclass model extends it (or reuses it if the subclass doesn't add any state attribute)
+        """
+        parent_models={getattr(base,'_state_model',None) for base in cls.__bases__}-{None}
+        if len([model for model in parent_models if not any(issubclass(other,model) for other in parent_models-{model})])>1:
+            raise TypeError(f"{cls.__name__} can't inherit state from more than one stateful base class")
+        parent_model=cls._state_model
+        name,_,details=get_class_dict(cls,excluded=cls._private)
+        own_attrs=frozenset(k for k in details if not k=='__annotations__')
+        if not own_attrs and not details['__annotations__']:
+            if parent_model is None:
+                # stateless class, no state model to build
+                cls._state_attrs=frozenset()
+                cls._attr_kinds={}
+            # otherwise state model, attributes and dispatch table are all inherited from the parent
+            return
+        cls._state_attrs=own_attrs if parent_model is None else own_attrs|cls._state_attrs
+        details.update(_instance_count=0,_state_name=name)
+        cls._state_model=build_class(name+'Model',(parent_model or reflex.Base,),details)
+        # Dispatch table mapping state attribute names to their kind (names not in the table are NOT_STATE)
+        state_vars=[k for k in cls._state_attrs if k in cls._state_model.__fields__]
+        cls._attr_kinds=dict.fromkeys(cls._state_attrs,STATE_ATTR)
+        cls._attr_kinds.update(dict.fromkeys(['set_'+k for k in state_vars],STATE_SETTER))
+        cls._attr_kinds.update(dict.fromkeys(state_vars,STATE_VAR))
+
+    @classmethod
+    def _setup_runtime_class(cls):
+        """
+        Prepares the class actually instantiated when calling cls:
+        a subclass in which user-defined state attributes are shadowed so that they get delegated to the reflex.State object.
+        The user-defined class itself is left untouched.
+        """
+        if cls._state_attrs:
+            attributes={attr:StateAttribute(attr) for attr in cls._state_attrs}
+            attributes.update(__slots__=(),__module__=cls.__module__,__qualname__=cls.__qualname__,_state_model=cls._state_model)
+            runtime_class=type(cls.__name__,(cls,),attributes)
+            runtime_class._runtime_class=runtime_class
+        else:
+            runtime_class=cls
+        cls._runtime_class=runtime_class
+
+    def __init_subclass__(cls,**kwargs):
         """
-        details=get_class_dict(cls,excluded=cls._private)
-        name=details['__name__']
-        cls._state_attrs={k:v for k,v in details.items() if not k in ('__name__','__bases__','__annotations__')}
-        details.update(__name__=name+'Model',__bases__=(reflex.Base,),_instance_count=0,_state_name=name)
-        cls._state_model=build_class(details)
-        for attr in cls._state_attrs:
-            delattr(cls,attr)
+        Sets up the state model and the runtime class once, when the subclass is created
+        (runtime classes, which reuse the state model of their parent, are skipped, and so is the state model of abstract base classes)
+        """
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get('_state_model') is not None:
+            return
+        if not cls.__dict__.get('_abstract',False):
+            cls._setup_state_model()
+        cls._setup_runtime_class()
+
+    def __new__(cls,*args,**kwargs):
+        return object.__new__(cls._runtime_class or cls)
    
     @classmethod 
     def _get_instance_state_class(cls):
         """
         Copy the state model into a reflex.State subclass, unique for each State instance.
+        Returns None if the class doesn't define any state attribute (builtin components for instance).
         """
-        if cls._state_model is None:
-            cls._setup_state_model()
+        if not cls._state_attrs:
+            return None
         cls._state_model._instance_count += 1
         instance_state_cls_name = f"{cls._state_model._state_name}_n{cls._state_model._instance_count}"
         instance_state_class = type(instance_state_cls_name, (cls._state_model, reflex.State),{})
         return instance_state_class
     
-    def _is_user_state_attr(self,attr):
-        """
-        Checks whether an attr is a user-defined state attr
-        """
-        if not hasattr(self,'_state') or self._state is None:
-            return False
-        else:
-            return attr in self.__class__._state_attrs
-        
-    def _is_state_variable(self,attr):
-        """
-        Checks whether an attr is a state variable
-        """
-        return self._is_user_state_attr(attr) and attr in self._state.__fields__
-    
-    def _is_state_setter(self,attr):
-        """
-        Checks whether an attr is a state setter
-        """
-        return attr.startswith('set_') and self._is_state_variable(attr[4:])
-    
-    def _is_state_attr(self,attr):
-        """
-        Checks whether an attr is a valid state attribute
-        """
-        return self._is_user_state_attr(attr) or self._is_state_setter(attr)
-    
     def _set_default(self,key,value):
         """
         Sets the default value of a state variable
         """
-        if self._is_state_variable(key):
-            self._state.__fields__[key].default=value
+        if self.__class__._attr_kinds.get(key)==STATE_VAR:
+            self._fields[key].default=value
         else:
             raise AttributeError(f"Could not assign state variable value. Invalid state variable: {key}")
     
     def __init__(self):
         self._state=self.__class__._get_instance_state_class()
+        self._fields=None if self._state is None else self._state.__fields__
 
     def __getattr__(self,key):
         """
         Delegate attribute access to the reflex.State object
         """    
-        if self._is_state_attr(key):
+        if self.__class__._attr_kinds.get(key):
             return getattr(self._state,key)
         else:
             raise AttributeError(f"Invalid state attribute: '{key}'")
@@ -183,9 +247,11 @@ class State:
         """
         if key in self.__class__._private:
             object.__setattr__(self,key,value)
-        elif self._is_state_variable(key):
+            return
+        kind=self.__class__._attr_kinds.get(key,NOT_STATE)
+        if kind==STATE_VAR:
             self._set_default(key,value)
-        elif self._is_state_attr(key):
+        elif kind:
             raise AttributeError(f"Cannot assign to a state attribute which is not a state variable: '{key}'.")
         else:
             raise AttributeError(f"Invalid state attribute: '{key}'")
@@ -193,16 +259,32 @@ class State:
 
 class Component(State):
 
-    _private=State._private+(
-        '_init_constructor',
+    __slots__=('_props','children','_dirty','_rendered','_parents','__weakref__')
+
+    _private=State._private|frozenset({
         '_constructor',
-        '_attach_state',
+        '_create',
+        '_props',
         'props',
+        '_dirty',
+        '_rendered',
+        '_parents',
+        '_adopt',
+        '_set_dirty',
         'get_component',
         '_render'
-    )
+    })
 
+    _abstract=True
     _constructor=None
+
+    @property
+    def props(self):
+        """
+        Read-only view of the props (children excepted)
+        Props are modified by setting them as attributes, so that the component gets marked as dirty
+        """
+        return MappingProxyType(self._props)
     
     def get_component(self,*childen,**props):
         """
@@ -210,44 +292,58 @@ class Component(State):
         """
         raise NotImplementedError("Custom components must implement a get_component method.")
     
-    def _attach_state(self,func):
+    def _create(self,*children,**props):
         """
-        Decorator: takes a function returning a reflex.Component instance and attach the state to the returned component
+        Calls the custom get_component method and returns the corresponding reflex.Component instance, with the state attached
         """
-        @wraps(func)
-        def decorated(*args,**kwargs):
-            component=func(*args,**kwargs)
+        component=self.get_component(*children,**props)
+        if isinstance(component,Component):
+            component=component._render()
+        elif not isinstance(component,reflex.Component):
+            raise TypeError("get_component must return a component object")
+        if self._state is not None:
             component.State=self._state
-            return component
-        return decorated
+        return component
 
-    def _init_constructor(self):
+    def _adopt(self,value):
         """
-        The reflex.Component constructor:
-        If none is specified at class level, this is a custom component so we return the decorated custom get_component method
-        If one is already specified at class level, this is a default component, so we use its constructor directly.
+        Registers the component as a parent of value if it is a Component object (a child or a prop),
+        so that modifying it also marks the component as dirty
         """
-        if self.__class__._constructor is None:
-            self._constructor=self._attach_state(auto_render(self.get_component))
-        else:
-            self._constructor=self.__class__._constructor
+        if isinstance(value,Component):
+            if value._parents is None:
+                value._parents=weakref.WeakSet()
+            value._parents.add(self)
+
+    def _set_dirty(self):
+        """
+        Marks the component and its ancestors as needing to be rendered again
+        """
+        if not self._dirty:
+            self._dirty=True
+            if self._parents is not None:
+                for parent in self._parents:
+                    parent._set_dirty()
 
     def __init__(self,*children,**props):
         State.__init__(self)
-        self._init_constructor()
-        self.props = dict(**props)
+        self._dirty=True
+        self._rendered=None
+        self._parents=None
         # the 'children' prop, if any, gets precedence over children passed as nested args (similar to React)
-        children=self.props.get('children') or children
-        self.props['children']=children
+        self.children=props.pop('children',None) or children
+        self._props = props
+        for value in props.values():
+            self._adopt(value)
 
     def __getattr__(self,key):
         """
         Delegate attribute access to the reflex.State object
         """
-        if self._is_state_attr(key):
+        if self.__class__._attr_kinds.get(key):
             return getattr(self._state,key)
-        elif key in self.props:
-            return self.props[key]
+        elif key in self._props:
+            return self._props[key]
         else:
             raise AttributeError(f"Invalid component attribute: '{key}'")
         
@@ -257,44 +353,59 @@ class Component(State):
         """
         if key in self.__class__._private:
             object.__setattr__(self,key,value)
-        elif self._is_state_variable(key):
-            self._set_default(key,value)
-            self.props[key]=value
-        elif self._is_state_attr(key):
-            raise AttributeError(f"Cannot assign to a component attribute which is not a prop or state variable: '{key}'.")
+            return
+        if key=='children':
+            # children are stored apart from the other props
+            # (materialized first, as they are iterated both here and when rendering)
+            value=tuple(value)
+            object.__setattr__(self,key,value)
+            for child in value:
+                self._adopt(child)
         else:
-            self.props[key]=value
+            kind=self.__class__._attr_kinds.get(key,NOT_STATE)
+            if kind==STATE_VAR:
+                self._set_default(key,value)
+            elif kind:
+                raise AttributeError(f"Cannot assign to a component attribute which is not a prop or state variable: '{key}'.")
+            self._props[key]=value
+            self._adopt(value)
+        self._set_dirty()
 
     def _render(self):
         """
         Renders the component
         ie. returns the corresponding reflex.Component instance
+        Only builtin components reuse their result as long as they are not marked as dirty:
+        custom components are rendered again each time, since get_component may read anything
         """
+        if not self._dirty:
+            return self._rendered
+
+        render=Component._render
 
         # First render the children
-        rendered_children=[]
-        for child in self.props['children']:
-            if isinstance(child,Component):
-                child=child._render()
-            rendered_children.append(child)
+        rendered_children=[render(child) if isinstance(child,Component) else child for child in self.children]
 
         # Then render the props
-        props={}
-        for key,prop in self.props.items():
-            if not key=='children':
-                if isinstance(prop,Component):
-                    prop=prop._render()
-                props[key]=prop
+        rendered_props={key:(render(prop) if isinstance(prop,Component) else prop) for key,prop in self._props.items()}
         
-        # Render the component by calling the constructor
-        return self._constructor(*rendered_children,**props)
+        # Render the component by calling the constructor:
+        # builtin components use the reflex constructor set at class level, custom components use _create (wrapping get_component)
+        constructor=self.__class__._constructor
+        if constructor is None:
+            # Never cached, the component stays dirty
+            return self._create(*rendered_children,**rendered_props)
+        self._rendered=constructor(*rendered_children,**rendered_props)
+        # A component holding a custom component (at any depth) stays dirty as well
+        self._dirty=any(isinstance(value,Component) and value._dirty for value in itertools.chain(self.children,self._props.values()))
+        return self._rendered
 
 
 def get_builtin_component(name=None,constructor=None):
     """
     Prepares a component class from a given builtin reflex constructor
     """
-    return type(name,(Component,),dict(_constructor=constructor))
+    return type(name,(Component,),dict(_constructor=constructor,__slots__=(),__module__=__name__))
 
 class App(reflex.App):
 
@@ -309,21 +420,23 @@ class App(reflex.App):
         super().add_page(auto_render(component),*args,**kwargs)
 
 def capitalize(string):
-    if len(string)>0:
-        return string[0].upper()+string[1:]
-    else:
-        return ""
+    return string[:1].upper()+string[1:]
+
+# Sentinel for attribute lookups with a default
+_MISSING=object()
 
 def resolve_attr_chain(chain):
-    obj=reflex
-    path='reflex'
-    for attr in chain:
-        if hasattr(obj,attr):
-            path+=f'.{attr}'
-            obj=getattr(obj,attr)
-        else:
-            raise AttributeError(f"{path} has no attribute '{attr}'.")
-    return obj
+    try:
+        return attrgetter('.'.join(chain))(reflex)
+    except AttributeError:
+        # Walk the chain again to report which attribute is missing
+        obj=reflex
+        for i,attr in enumerate(chain):
+            obj=getattr(obj,attr,_MISSING)
+            if obj is _MISSING:
+                path='.'.join(('reflex',*chain[:i]))
+                raise AttributeError(f"{path} has no attribute '{attr}'.")
+        raise
 
 def chain_as_path(chain):
     return 'reflex.'+'.'.join(chain)
@@ -336,27 +449,33 @@ class rx_submodule:
     """
     Class representing a reflex submodule, to implement attribute chain lookup from the rx class.
     Does the routing to the appropriate component/object/submodule
+    The chain of attribute names is stored as a tuple, used as key in rx._dict
     """
 
+    # __dict__ is kept to cache resolved attributes (see __getattr__)
+    __slots__=('chain','path','obj','__dict__')
+
     def __init__(self,chain):
         self.chain=chain
         self.path=chain_as_path(self.chain)
         self.obj=resolve_attr_chain(self.chain)
 
     def __getattr__(self, key):
-        chain=self.chain+[key]
-        path=chain_as_path(chain)
-        if path in rx._dict:
-            return rx._dict[path]
-        elif hasattr(self.obj,key) and callable(getattr(self.obj,key)):
-            name=chain_as_name(chain)
-            new_cls=get_builtin_component(name=name,constructor=getattr(self.obj,key))
-            rx._dict[path]=new_cls
-            return new_cls
-        elif hasattr(self.obj,key):
-            return rx_submodule(chain)
-        else:
-            raise AttributeError(f"{self.path} has no attribute named {key}.")
+        chain=self.chain+(key,)
+        value=rx._dict.get(chain,_MISSING)
+        if value is _MISSING:
+            attr=getattr(self.obj,key,_MISSING)
+            if attr is _MISSING:
+                raise AttributeError(f"{self.path} has no attribute named {key}.")
+            elif callable(attr):
+                name=chain_as_name(chain)
+                value=get_builtin_component(name=name,constructor=attr)
+            else:
+                value=rx_submodule(chain)
+            rx._dict[chain]=value
+        # store the result in the instance dict so that __getattr__ is bypassed next time
+        self.__dict__[key]=value
+        return value
 
 
 class rx_meta(type):
@@ -368,24 +487,25 @@ class rx_meta(type):
 
     def __getattr__(cls, key):
         if key in cls._reserved:
-            return getattr(reflex,key)
+            value=getattr(reflex,key)
         elif key in globals():
-            return globals()[key]
-        
-        chain=[key]
-        path=chain_as_path(chain)
-
-        if path in rx._dict:
-            return rx._dict[path]
-        elif hasattr(reflex,key) and callable(getattr(reflex,key)):
-            name=chain_as_name(chain)
-            new_cls=get_builtin_component(name=name,constructor=getattr(reflex,key))
-            rx._dict[path]=new_cls
-            return new_cls
-        elif hasattr(reflex,key):
-            return rx_submodule(chain)
+            value=globals()[key]
         else:
-            raise AttributeError(f"reflex has no attribute named {key}.")
+            chain=(key,)
+            value=rx._dict.get(chain,_MISSING)
+            if value is _MISSING:
+                attr=getattr(reflex,key,_MISSING)
+                if attr is _MISSING:
+                    raise AttributeError(f"reflex has no attribute named {key}.")
+                elif callable(attr):
+                    name=chain_as_name(chain)
+                    value=get_builtin_component(name=name,constructor=attr)
+                else:
+                    value=rx_submodule(chain)
+                rx._dict[chain]=value
+        # store the result in the class dict so that __getattr__ is bypassed next time
+        setattr(cls,key,value)
+        return value
 
 
 class rx(metaclass=rx_meta):
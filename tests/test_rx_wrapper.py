@@ -0,0 +1,155 @@
+import pytest
+import reflex
+
+from reflex_wrapper import rx
+
+
+def test_custom_component_with_empty_slots():
+    class Stateless(rx.Component):
+        __slots__ = ()
+
+        def get_component(self, *children, **props):
+            return rx.box(*children, **props)
+
+    rendered = Stateless(rx.text("a"))._render()
+    assert isinstance(rendered, reflex.Component)
+    assert len(rendered.children) == 1
+
+
+def test_builtin_component_with_function_constructor():
+    rendered = rx.cond(True, rx.text("a"), rx.text("b"))._render()
+    assert isinstance(rendered, reflex.Component)
+
+
+def test_children_from_generator():
+    box = rx.box(children=(rx.text(s) for s in "ab"))
+    assert len(box._render().children) == 2
+    box.children = (rx.text(s) for s in "xyz")
+    assert len(box._render().children) == 3
+
+
+def test_props_are_read_only():
+    text = rx.text("a", color="red")
+    assert text.props == {"color": "red"}
+    with pytest.raises(TypeError):
+        text.props["color"] = "blue"
+    with pytest.raises(AttributeError):
+        text.props = {}
+
+
+def test_render_is_reused_until_a_prop_changes():
+    text = rx.text("a")
+    rendered = text._render()
+    assert text._render() is rendered
+    text.color = "blue"
+    rerendered = text._render()
+    assert rerendered is not rendered
+    assert "blue" in str(rerendered)
+
+
+def test_dirty_flag_propagates_to_ancestors():
+    text = rx.text("a")
+    box = rx.box(rx.vstack(text), header=rx.text("h"))
+    rendered = box._render()
+    text.color = "blue"
+    rerendered = box._render()
+    assert rerendered is not rendered
+    assert "blue" in str(rerendered)
+    assert box._render() is rerendered
+
+
+def test_custom_component_is_rendered_again():
+    header = rx.text("h")
+
+    class Page(rx.Component):
+        def get_component(self, *children, **props):
+            return rx.box(header)
+
+    page = Page()
+    box = rx.box(page)
+    box._render()
+    header.color = "red"
+    assert "red" in str(page._render())
+    assert "red" in str(box._render())
+
+
+def test_dirty_flag_propagates_from_props():
+    inner = rx.text("a")
+    outer = rx.box(header=inner)
+    outer._render()
+    inner.color = "blue"
+    assert outer._dirty
+
+
+def test_state_var_assignment_marks_component_dirty():
+    class TextCounter(rx.Component):
+        count: int = 0
+
+        def get_component(self, *children, **props):
+            return rx.text(self.count)
+
+    counter = TextCounter()
+    box = rx.box(counter)
+    box._render()
+    counter.count = 3
+    assert counter._dirty and box._dirty
+    assert counter._state.__fields__["count"].default == 3
+
+
+class Counter(rx.Component):
+    count: int = 0
+
+    def increment(self):
+        self.count += 1
+
+    def get_component(self, *children, **props):
+        return rx.hstack(
+            rx.button("+", on_click=self.increment),
+            rx.text(self.count),
+            **props,
+        )
+
+
+def test_subclass_extends_parent_state():
+    class LabeledCounter(Counter):
+        label: str = "x"
+
+    counter = LabeledCounter()
+    assert isinstance(counter.count, reflex.Var)
+    assert isinstance(counter.label, reflex.Var)
+    assert isinstance(counter.increment, reflex.event.EventHandler)
+    rendered = str(counter._render())
+    assert "increment" in rendered and "count" in rendered
+    counter.label = "y"
+    assert counter._state.__fields__["label"].default == "y"
+
+
+def test_subclass_overriding_get_component_keeps_parent_state():
+    class HeadingCounter(Counter):
+        def get_component(self, *children, **props):
+            return rx.heading(self.count, on_click=self.increment)
+
+    counter = HeadingCounter()
+    assert counter._state is not None
+    assert isinstance(counter.count, reflex.Var)
+    assert "increment" in str(counter._render())
+
+
+def test_subclass_of_several_stateful_bases_is_rejected():
+    class Toggle(rx.Component):
+        on: bool = False
+
+        def get_component(self, *children, **props):
+            return rx.text(self.on)
+
+    with pytest.raises(TypeError):
+        class CounterToggle(Counter, Toggle):
+            pass
+
+    class TitledCounter(Counter):
+        label: str = "x"
+
+    class CounterMixin(TitledCounter, Counter):
+        pass
+
+    assert CounterMixin._state_model is TitledCounter._state_model